@@ -39,6 +39,8 @@ class FsBased(base):
             location = pjoin(location, label.lstrip(os.path.sep))
 
         self.location = location
+        # precomputed so per-entry _ensure_dirs calls are a single concat
+        self._location_prefix = pjoin(location, "")
 
         self._mtime_used = "mtime" == self.chf_type
 
@@ -58,9 +60,10 @@ class FsBased(base):
         :param mtime: if specified change mtime to this value.
         :return: C{False} if unable to guarantee access, C{True} otherwise.
         """
+        gid, perms = self._gid, self._perms
         try:
-            os.chown(path, -1, self._gid)
-            os.chmod(path, self._perms)
+            os.chown(path, -1, gid)
+            os.chmod(path, perms)
             if mtime is not None:
                 mtime = int(mtime)
                 os.utime(path, (mtime, mtime))
@@ -71,7 +74,7 @@ class FsBased(base):
     def _ensure_dirs(self, path=None):
         """Make sure a path relative to C{self.location} exists."""
         if path is not None:
-            path = pjoin(self.location, os.path.dirname(path))
+            path = self._location_prefix + os.path.dirname(path)
         else:
             path = self.location
         return ensure_dirs(path, mode=0o775, minimal=False)
@@ -201,19 +201,31 @@ class DepSet(boolean.AndRestriction):
     @staticmethod
     def find_cond_nodes(restriction_set, yield_non_conditionals=False):
         conditions_stack = []
-        new_set = expandable_chain(restriction_set)
-        for cur_node in new_set:
-            if isinstance(cur_node, packages.Conditional):
-                conditions_stack.append(cur_node.restriction)
-                new_set.appendleft(list(cur_node.payload) + [None])
-            elif isinstance(cur_node, transitive_use_atom):
-                new_set.appendleft(cur_node.convert_to_conditionals())
-            elif isinstance(cur_node, boolean.base) and not isinstance(cur_node, atom):
-                new_set.appendleft(cur_node.restrictions)
-            elif cur_node is None:
-                conditions_stack.pop()
-            elif conditions_stack or yield_non_conditionals:  # leaf
-                yield (cur_node, conditions_stack[:])
+        # walk nested restrictions depth first via a stack of iterators, which
+        # avoids expandable_chain's per element overhead; a None sentinel is
+        # queued after each conditional's payload to pop its condition.
+        iterators = [iter(restriction_set)]
+        while iterators:
+            for cur_node in iterators[-1]:
+                if isinstance(cur_node, packages.Conditional):
+                    conditions_stack.append(cur_node.restriction)
+                    iterators.append(iter((None,)))
+                    iterators.append(iter(cur_node.payload))
+                    break
+                elif isinstance(cur_node, transitive_use_atom):
+                    iterators.append(iter(cur_node.convert_to_conditionals()))
+                    break
+                elif isinstance(cur_node, boolean.base) and not isinstance(
+                    cur_node, atom
+                ):
+                    iterators.append(iter(cur_node.restrictions))
+                    break
+                elif cur_node is None:
+                    conditions_stack.pop()
+                elif conditions_stack or yield_non_conditionals:  # leaf
+                    yield (cur_node, conditions_stack[:])
+            else:
+                iterators.pop()
 
     @property
     def node_conds(self):
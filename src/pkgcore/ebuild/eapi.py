@@ -3,7 +3,7 @@ import re
 import subprocess
 import sys
 from collections import defaultdict
-from functools import partial
+from functools import lru_cache, partial
 from weakref import WeakValueDictionary
 
 from snakeoil import klass
@@ -137,6 +137,15 @@ class _optionals_cls(ImmutableDict):
     inject_getitem_as_getattr(locals())
 
 
+@lru_cache
+def _helper_dirs(path):
+    """Directories under a given EAPI helper path that contain helpers.
+
+    Cached since EAPIs share the helper dirs of all the EAPIs they inherit from.
+    """
+    return tuple(dirpath for dirpath, _, filenames in os.walk(path) if filenames)
+
+
 class EAPI(metaclass=klass.immutable_instance):
     known_eapis = WeakValueDictionary()
     unknown_eapis = WeakValueDictionary()
@@ -198,6 +207,8 @@ class EAPI(metaclass=klass.immutable_instance):
     @classmethod
     def register(cls, *args, **kwds):
         eapi = cls(*args, **kwds)
+        if _valid_EAPI_regex.match(eapi._magic) is None:
+            raise ValueError(f"invalid EAPI {eapi._magic!r}")
         pre_existing = cls.known_eapis.get(eapi._magic)
         if pre_existing is not None:
             raise ValueError(
@@ -396,7 +407,9 @@ class EAPI(metaclass=klass.immutable_instance):
     @klass.jit_attr
     def archive_exts_regex_pattern(self):
         """Regex pattern for supported archive extensions."""
-        pattern = "|".join(map(re.escape, self.archive_exts))
+        # longest extensions first so e.g. .tar.gz is tried before .gz
+        exts = sorted(self.archive_exts, key=lambda x: (-len(x), x))
+        pattern = "|".join(map(re.escape, exts))
         if self.options.unpack_case_insensitive:
             return f"(?i:({pattern}))"
         return f"({pattern})"
@@ -451,9 +464,7 @@ class EAPI(metaclass=klass.immutable_instance):
         for eapi in self.inherits:
             paths["global"].append(pjoin(const.EBUILD_HELPERS_PATH, "common"))
             helper_dir = pjoin(const.EBUILD_HELPERS_PATH, eapi._magic)
-            for dirpath, dirnames, filenames in os.walk(helper_dir):
-                if not filenames:
-                    continue
+            for dirpath in _helper_dirs(helper_dir):
                 if dirpath == helper_dir:
                     paths["global"].append(dirpath)
                 else:
@@ -481,19 +492,28 @@ class EAPI(metaclass=klass.immutable_instance):
 
 def get_eapi(magic, suppress_unsupported=True):
     """Return EAPI object for a given identifier."""
+    # registered EAPIs are validated on registration, skip the regex for them
+    eapi = EAPI.known_eapis.get(magic)
+    if eapi is not None:
+        return eapi
+    if suppress_unsupported:
+        # unknown EAPIs are only cached after passing validation
+        eapi = EAPI.unknown_eapis.get(magic)
+        if eapi is not None:
+            return eapi
     if _valid_EAPI_regex.match(magic) is None:
         eapi_str = f" {magic!r}" if magic else ""
         raise ValueError(f"invalid EAPI{eapi_str}")
-    eapi = EAPI.known_eapis.get(magic)
-    if eapi is None and suppress_unsupported:
-        eapi = EAPI.unknown_eapis.get(magic)
-        if eapi is None:
-            eapi = EAPI(magic=magic, optionals={"is_supported": False})
-            EAPI.unknown_eapis[eapi._magic] = eapi
+    if suppress_unsupported:
+        eapi = EAPI(magic=magic, optionals={"is_supported": False})
+        EAPI.unknown_eapis[eapi._magic] = eapi
     return eapi
 
 
 def _shorten_phase_name(func_name):
+    name = _short_phase_names.get(func_name)
+    if name is not None:
+        return name
     if func_name.startswith(("src_", "pkg_")):
         return func_name[4:]
     return func_name
@@ -504,14 +524,14 @@ def _mk_phase_func_map(*sequence):
 
 
 def _combine_dicts(*mappings):
-    return {k: v for d in mappings for k, v in d.items()}
+    d = {}
+    for mapping in mappings:
+        d.update(mapping)
+    return d
 
 
 # Note that pkg_setup is forced by default since this is how our env setup occurs.
-common_default_phases = tuple(
-    _shorten_phase_name(x)
-    for x in ("pkg_setup", "src_unpack", "src_compile", "src_test", "pkg_nofetch")
-)
+common_default_phases = ("setup", "unpack", "compile", "test", "nofetch")
 
 common_phases = (
     "pkg_setup",
@@ -528,6 +548,11 @@ common_phases = (
     "src_install",
 )
 
+# precomputed short names for all known phase funcs
+_short_phase_names = {
+    x: x[4:] for x in common_phases + ("pkg_pretend", "src_prepare", "src_configure")
+}
+
 common_mandatory_metadata_keys = (
     "DESCRIPTION",
     "HOMEPAGE",
@@ -624,7 +649,7 @@ eapi0 = EAPI.register(
     magic="0",
     parent=None,
     phases=_mk_phase_func_map(*common_phases),
-    default_phases=_mk_phase_func_map(*common_default_phases),
+    default_phases=common_default_phases,
     mandatory_keys=common_mandatory_metadata_keys,
     dep_keys=common_dep_keys,
     metadata_keys=common_metadata_keys,
@@ -662,9 +687,7 @@ eapi2 = EAPI.register(
     phases=_combine_dicts(
         eapi1.phases, _mk_phase_func_map("src_prepare", "src_configure")
     ),
-    default_phases=eapi1.default_phases.union(
-        list(map(_shorten_phase_name, ["src_prepare", "src_configure"]))
-    ),
+    default_phases=eapi1.default_phases.union(["prepare", "configure"]),
     mandatory_keys=eapi1.mandatory_keys,
     dep_keys=eapi1.dep_keys,
     metadata_keys=eapi1.metadata_keys,
@@ -708,7 +731,7 @@ eapi4 = EAPI.register(
     magic="4",
     parent=eapi3,
     phases=_combine_dicts(eapi3.phases, _mk_phase_func_map("pkg_pretend")),
-    default_phases=eapi3.default_phases.union([_shorten_phase_name("src_install")]),
+    default_phases=eapi3.default_phases.union(["install"]),
     mandatory_keys=eapi3.mandatory_keys,
     dep_keys=eapi3.dep_keys,
     metadata_keys=eapi3.metadata_keys | frozenset(["REQUIRED_USE"]),
@@ -10,32 +10,34 @@ from ..exceptions import PkgcoreException, PkgcoreUserException
 class RepoError(PkgcoreException):
     """General repository error."""
 
+    _template = "%s"
+
     def __init__(self, msg):
         self.msg = msg
 
+    def __str__(self):
+        return self._template % (self.msg,)
+
 
 class InitializationError(RepoError, PkgcoreUserException):
     """General repository initialization failure."""
 
-    def __str__(self):
-        return f"repo init failed: {self.msg}"
+    _template = "repo init failed: %s"
 
 
 class InvalidRepo(InitializationError, PkgcoreUserException):
     """Repository is not a repo or is otherwise invalid."""
 
-    def __str__(self):
-        return f"invalid repo: {self.msg}"
+    _template = "invalid repo: %s"
 
 
 class UnsupportedRepo(RepoError, PkgcoreUserException):
     """Repository uses an unknown EAPI or is otherwise not supported."""
 
+    _template = "%r repo: unsupported repo EAPI %r"
+
     def __init__(self, repo):
         self.repo = repo
 
     def __str__(self):
-        return (
-            f"{self.repo.repo_id!r} repo: "
-            f"unsupported repo EAPI {str(self.repo.eapi)!r}"
-        )
+        return self._template % (self.repo.repo_id, str(self.repo.eapi))
@@ -1,5 +1,7 @@
 __all__ = ("choice_point",)
 
+from itertools import filterfalse
+
 from snakeoil import klass
 from snakeoil.sequences import iter_stable_unique
 
@@ -52,8 +54,9 @@ class choice_point:
 
     @staticmethod
     def _filter_choices(cnf_reqs, filterset):
+        filtered = filterset.__contains__
         for choices in cnf_reqs:
-            l = [x for x in choices if x not in filterset]
+            l = list(filterfalse(filtered, choices))
             if not l:
                 return
             yield l
@@ -96,13 +99,14 @@ class choice_point:
                 if not self._internal_force_next():
                     return True
 
-            for depset_name in ("_bdeps", "_deps", "_rdeps", "_prdeps"):
-                depset = getattr(self, depset_name)
+            reduced = []
+            for depset in (self._bdeps, self._deps, self._rdeps, self._prdeps):
                 reqs = list(self._filter_choices(depset, filterset))
                 if len(reqs) != len(depset):
                     break
-                setattr(self, depset_name, reqs)
+                reduced.append(reqs)
             else:
+                self._bdeps, self._deps, self._rdeps, self._prdeps = reduced
                 return round > 0
 
     def _reset_iters(self):
@@ -1,7 +1,12 @@
 __all__ = ("PigeonHoledSlots",)
 
+from snakeoil.mappings import ImmutableDict
+
 from ..restrictions import restriction
 
+# shared fallback for keys with nothing slotted/limited
+_empty = ImmutableDict()
+
 # lil too getter/setter like for my tastes...
 
 
@@ -9,8 +14,13 @@ class PigeonHoledSlots:
     """class for tracking slotting to a specific atom/obj key
     no atoms present, just prevents conflicts of obj.key; atom present, assumes
     it's a blocker and ensures no obj matches the atom for that key
+
+    Both slot_dict and limiters map a key to an insertion ordered dict of
+    id(obj) -> obj so removal is a hash lookup rather than a list rebuild.
     """
 
+    __slots__ = ("slot_dict", "limiters")
+
     def __init__(self):
         self.slot_dict = {}
         self.limiters = {}
@@ -25,14 +35,18 @@ class PigeonHoledSlots:
 
         key = obj.key
         dslot = obj.slot
-        l.extend(x for x in self.slot_dict.get(key, ()) if x.slot == dslot)
+        slots = self.slot_dict.get(key)
+        if slots:
+            l.extend(x for x in slots.values() if x.slot == dslot)
 
         if not l or force:
-            self.slot_dict.setdefault(key, []).append(obj)
+            if slots is None:
+                slots = self.slot_dict[key] = {}
+            slots[id(obj)] = obj
         return l
 
     def get_conflicting_slot(self, pkg):
-        for x in self.slot_dict.get(pkg.key, ()):
+        for x in self.slot_dict.get(pkg.key, _empty).values():
             if pkg.slot == x.slot:
                 return x
         return None
@@ -40,7 +54,7 @@ class PigeonHoledSlots:
     def find_atom_matches(self, atom, key=None):
         if key is None:
             key = atom.key
-        return list(filter(atom.match, self.slot_dict.get(key, ())))
+        return list(filter(atom.match, self.slot_dict.get(key, _empty).values()))
 
     def add_limiter(self, atom, key=None):
         """add a limiter, returning any conflicting objs"""
@@ -52,38 +66,36 @@ class PigeonHoledSlots:
 
         if key is None:
             key = atom.key
-        self.limiters.setdefault(key, []).append(atom)
+        limiters = self.limiters.get(key)
+        if limiters is None:
+            limiters = self.limiters[key] = {}
+        limiters[id(atom)] = atom
         return self.find_atom_matches(atom, key=key)
 
     def check_limiters(self, obj):
         """return any limiters conflicting w/ the passed in obj"""
         key = obj.key
-        return [x for x in self.limiters.get(key, ()) if x.match(obj)]
+        return [x for x in self.limiters.get(key, _empty).values() if x.match(obj)]
 
     def remove_slotting(self, obj):
         key = obj.key
         # let the key error be thrown if they screwed up.
-        slots = self.slot_dict.get(key, ())
-        l = [x for x in slots if x is not obj]
-        if len(l) == len(slots):
+        slots = self.slot_dict.get(key)
+        if slots is None or slots.pop(id(obj), None) is None:
             raise KeyError(f"obj {obj} isn't slotted")
-        if l:
-            self.slot_dict[key] = l
-        else:
+        if not slots:
             del self.slot_dict[key]
 
     def remove_limiter(self, atom, key=None):
         if key is None:
             key = atom.key
-        l = [x for x in self.limiters[key] if x is not atom]
-        if len(l) == len(self.limiters[key]):
+        limiters = self.limiters[key]
+        if limiters.pop(id(atom), None) is None:
             raise KeyError(f"obj {atom} isn't slotted")
-        if not l:
+        if not limiters:
             del self.limiters[key]
-        else:
-            self.limiters[key] = l
 
     def __contains__(self, obj):
         if isinstance(obj, restriction.base):
-            return obj in self.limiters.get(obj.key, ())
-        return obj in self.slot_dict.get(obj.key, ())
+            return obj in self.limiters.get(obj.key, _empty).values()
+        return obj in self.slot_dict.get(obj.key, _empty).values()
@@ -2,12 +2,11 @@ __all__ = ("resolver_frame", "resolver_stack", "merge_plan")
 
 import operator
 import sys
-from collections import deque
+from collections import Counter, deque
 from functools import partial
 from itertools import chain, filterfalse, islice
 
 from snakeoil.compatibility import cmp, sort_cmp
-from snakeoil.iterables import caching_iter
 
 # XXX: hack; see insert_blockers
 from ..ebuild import atom as _atom
@@ -215,6 +214,9 @@ class resolver_stack(deque):
 
     def __init__(self):
         self.events = []
+        # count of frames per package key, mirroring the stack contents so
+        # cycle checks don't have to walk every frame.
+        self._key_counts = Counter()
 
     def __str__(self):
         return "resolver stack:\n  %s" % "\n  ".join(str(x) for x in self)
@@ -241,6 +243,7 @@ class resolver_stack(deque):
             vdb_limited=vdb_limited,
         )
         self.append(frame)
+        self._key_counts[getattr(atom, "key", None)] += 1
         return frame
 
     def add_event(self, event):
@@ -251,9 +254,24 @@ class resolver_stack(deque):
 
     def pop_frame(self, result):
         frame = self.pop()
+        key = getattr(frame.atom, "key", None)
+        if self._key_counts[key] == 1:
+            del self._key_counts[key]
+        else:
+            self._key_counts[key] -= 1
         frame.succeeded = bool(result)
         frame.parent.events.append(frame)
 
+    def may_cycle(self, frame):
+        """Check if other frames on the stack could be for the same package key.
+
+        Frames for unkeyed restrictions can match any key, so their presence
+        always requires a full walk of the stack.
+        """
+        counts = self._key_counts
+        key = getattr(frame.atom, "key", None)
+        return key is None or None in counts or counts[key] > 1
+
     def slot_cycles(self, trg_frame, **kwds):
         pkg = trg_frame.current_pkg
         slot = pkg.slot
@@ -277,13 +295,13 @@ class resolver_stack(deque):
         return i
 
     def index(self, frame, start=0, stop=None):
-        i = self
-        if start != 0 or stop is not None:
-            i = slice(i, start, stop)
-
-        for idx, x in enumerate(self):
-            if x == frame:
-                return idx + start
+        # frames are only ever pushed/popped at the tail, so a frame's depth
+        # is its position in the stack; avoid walking the stack to find it.
+        idx = frame.depth - 1
+        if stop is None:
+            stop = len(self)
+        if start <= idx < stop and idx < len(self) and self[idx] is frame:
+            return idx
         return -1
 
 
@@ -363,6 +381,8 @@ class merge_plan:
         self.state.backtrack(point)
 
     def notify_starting_mode(self, mode, stack):
+        if not self._debugging:
+            return
         if mode == "pdepend":
             mode = "prdepends"
         self._dprint(
@@ -376,42 +396,44 @@ class merge_plan:
         )
 
     def notify_trying_choice(self, stack, atom, choices):
-        self._dprint(
-            "choose for %s%s, %s", (stack.depth * 2 * " ", atom, choices.current_pkg)
-        )
-        stack.add_event(("inspecting", choices.current_pkg))
+        pkg = choices.current_pkg
+        if self._debugging:
+            self._dprint("choose for %s%s, %s", (stack.depth * 2 * " ", atom, pkg))
+        stack.add_event(("inspecting", pkg))
 
     def notify_choice_failed(self, stack, atom, choices, msg, msg_args=()):
-        stack[-1].events.append(
-            ("choice", str(choices.current_pkg), False, msg % msg_args)
-        )
-        if msg:
-            msg = ": %s" % (msg % msg_args)
-        self._dprint(
-            "choice for %s%s, %s failed%s",
-            (stack.depth * 2 * " ", atom, choices.current_pkg, msg),
-        )
+        msg = msg % msg_args
+        stack[-1].events.append(("choice", str(choices.current_pkg), False, msg))
+        if self._debugging:
+            if msg:
+                msg = ": %s" % msg
+            self._dprint(
+                "choice for %s%s, %s failed%s",
+                (stack.depth * 2 * " ", atom, choices.current_pkg, msg),
+            )
 
     def notify_choice_succeeded(self, stack, atom, choices, msg="", msg_args=()):
         stack[-1].events.append(("choice", str(choices.current_pkg), True, msg))
-        if msg:
-            msg = ": %s" % (msg % msg_args)
-        self._dprint(
-            "choice for %s%s, %s succeeded%s",
-            (stack.depth * 2 * " ", atom, choices.current_pkg, msg),
-        )
+        if self._debugging:
+            if msg:
+                msg = ": %s" % (msg % msg_args)
+            self._dprint(
+                "choice for %s%s, %s succeeded%s",
+                (stack.depth * 2 * " ", atom, choices.current_pkg, msg),
+            )
 
     def notify_viable(self, stack, atom, viable, msg="", pre_solved=False):
-        t_viable = viable and "processing" or "not viable"
-        if pre_solved and viable:
-            t_viable = "pre-solved"
-        t_msg = msg and (" " + msg) or ""
-        s = ""
-        if stack:
-            s = " for %s " % (stack[-1].atom)
-        self._dprint(
-            "%s%s%s%s%s", (t_viable.ljust(13), "  " * stack.depth, atom, s, t_msg)
-        )
+        if self._debugging:
+            t_viable = viable and "processing" or "not viable"
+            if pre_solved and viable:
+                t_viable = "pre-solved"
+            t_msg = msg and (" " + msg) or ""
+            s = ""
+            if stack:
+                s = " for %s " % (stack[-1].atom)
+            self._dprint(
+                "%s%s%s%s%s", (t_viable.ljust(13), "  " * stack.depth, atom, s, t_msg)
+            )
         stack.add_event(("viable", viable, pre_solved, atom, msg))
 
     def load_vdb_state(self):
@@ -498,9 +520,12 @@ class merge_plan:
         choices, matches = matches
 
         depth = stack.depth
+        debugging = self._debugging
 
-        if stack:
-            if limit_to_vdb:
+        if debugging:
+            if not stack:
+                self._dprint("processing   %s%s", (depth * 2 * " ", atom))
+            elif limit_to_vdb:
                 self._dprint(
                     "processing   %s%s  [%s]; mode %s vdb bound",
                     (depth * 2 * " ", atom, stack[-1].atom, mode),
@@ -510,8 +535,6 @@ class merge_plan:
                     "processing   %s%s  [%s]; mode %s",
                     (depth * 2 * " ", atom, stack[-1].atom, mode),
                 )
-        else:
-            self._dprint("processing   %s%s", (depth * 2 * " ", atom))
 
         ret = self.check_for_cycles(stack, stack.current_frame)
         if ret is not True:
@@ -520,7 +543,6 @@ class merge_plan:
 
         failures = []
 
-        debugging = self._debugging
         last_state = None
         while choices:
             if debugging:
@@ -544,39 +566,33 @@ class merge_plan:
                         )
                     )
                 last_state = new_state
-            additions = []
-
             self.notify_trying_choice(stack, atom, choices)
 
             if not choices.current_pkg.built or self.process_built_depends:
-                new_additions, failures = self.process_dependencies_and_blocks(
+                failures = self.process_dependencies_and_blocks(
                     stack, choices, "depend", atom, depth
                 )
                 if failures:
                     continue
-                additions += new_additions
 
-                new_additions, failures = self.process_dependencies_and_blocks(
+                failures = self.process_dependencies_and_blocks(
                     stack, choices, "bdepend", atom, depth
                 )
                 if failures:
                     continue
-                additions += new_additions
 
-            new_additions, failures = self.process_dependencies_and_blocks(
+            failures = self.process_dependencies_and_blocks(
                 stack, choices, "rdepend", atom, depth
             )
             if failures:
                 continue
-            additions += new_additions
 
             # TODO: do we need a conditional for merging a pkg here?
-            new_additions, failures = self.process_dependencies_and_blocks(
+            failures = self.process_dependencies_and_blocks(
                 stack, choices, "idepend", atom, depth
             )
             if failures:
                 continue
-            additions += new_additions
 
             l = self.insert_choice(atom, choices)
             if l is False:
@@ -596,18 +612,18 @@ class merge_plan:
                 choices.force_next_pkg()
                 continue
 
-            new_additions, failures = self.process_dependencies_and_blocks(
+            failures = self.process_dependencies_and_blocks(
                 stack, choices, "pdepend", atom, depth
             )
             if failures:
                 continue
-            additions += new_additions
 
             self.notify_choice_succeeded(stack, atom, choices)
             stack.pop_frame(True)
             return None
 
-        self._dprint("no solution  %s%s", (depth * 2 * " ", atom))
+        if debugging:
+            self._dprint("no solution  %s%s", (depth * 2 * " ", atom))
         stack.add_event(
             (
                 "debug",
@@ -647,7 +663,7 @@ class merge_plan:
         :param drop_cycles: boolean controlling whether to drop dep cycles
         :param limit_to_vdb: boolean controlling considering pkgs only from the vdb
         :return: 3 possible; None (not viable), True (presolved),
-          :obj:`caching_iter` (not solved, but viable), :obj:`choice_point`
+          :obj:`choice_point` and matches iterator (not solved, but viable)
         """
         if self.pdb_intercept.match(atom):
             import pdb
@@ -663,7 +679,14 @@ class merge_plan:
                 ret = ((True,), {"pre_solved": True})
             else:
                 # not in the plan thus far.
-                matches = caching_iter(dbs.itermatch(atom))
+                # peek at the first match rather than wrapping the matches in
+                # a caching_iter; the choice point just iterates them once.
+                matches = iter(dbs.itermatch(atom))
+                for pkg in matches:
+                    matches = chain((pkg,), matches)
+                    break
+                else:
+                    matches = ()
                 if matches:
                     choices = choice_point(atom, matches)
                     # ignore what dropped out, at this juncture we don't care.
@@ -709,6 +732,9 @@ class merge_plan:
         :return: True if no issues and resolution should continue, else the
             value to return after collapsing the calling frame
         """
+        if not stack.may_cycle(cur_frame):
+            # common case; nothing else on the stack can be the same pkg.
+            return True
         force_vdb = False
         for frame in stack.slot_cycles(cur_frame, reverse=True):
             if not any(
@@ -766,26 +792,18 @@ class merge_plan:
             depth = stack.depth
         depset = self.depset_reorder(getattr(choices, attr), attr)
         l = self.process_dependencies(stack, choices, attr, depset, atom)
-        if len(l) == 1:
-            self._dprint(
-                "resetting for %s%s because of %s: %s",
-                (depth * 2 * " ", atom, attr, l[0]),
-            )
+        if l is not None:
+            if self._debugging:
+                self._dprint(
+                    "resetting for %s%s because of %s: %s",
+                    (depth * 2 * " ", atom, attr, l[0]),
+                )
             self.state.backtrack(stack.current_frame.start_point)
-            return [], l[0]
-
-        additions = l[0]
-        return additions, []
+            return l[0]
+        return []
 
     def process_dependencies(self, stack, choices, mode, depset, atom):
         failure = []
-        (
-            additions,
-            blocks,
-        ) = (
-            [],
-            [],
-        )
         cur_frame = stack.current_frame
         self.notify_starting_mode(mode, stack)
         for potentials in depset:
@@ -794,7 +812,6 @@ class merge_plan:
                 if or_node.blocks:
                     failure = self.process_blocker(stack, choices, or_node, mode, atom)
                     if not failure:
-                        blocks.append(or_node)
                         break
                 else:
                     failure = self._rec_add_atom(
@@ -805,16 +822,16 @@ class merge_plan:
                         drop_cycles=cur_frame.drop_cycles,
                     )
                     if not failure:
-                        additions.append(or_node)
                         break
                     # XXX this is whacky tacky fantastically crappy
                     # XXX kill it; purpose seems... questionable.
                     if cur_frame.drop_cycles:
-                        self._dprint(
-                            "%s level cycle: %s: " "dropping cycle for %s from %s",
-                            (mode, cur_frame.atom, or_node, cur_frame.current_pkg),
-                            "cycle",
-                        )
+                        if self._debugging:
+                            self._dprint(
+                                "%s level cycle: %s: dropping cycle for %s from %s",
+                                (mode, cur_frame.atom, or_node, cur_frame.current_pkg),
+                                "cycle",
+                            )
                         failure = None
                         break
 
@@ -826,7 +843,7 @@ class merge_plan:
                 cur_frame.reduce_solutions(potentials)
                 return [potentials]
         else:  # all potentials were usable.
-            return additions, blocks
+            return None
 
     def process_blocker(self, stack, choices, blocker, mode, atom):
         ret = self.insert_blockers(stack, choices, [blocker])
@@ -889,10 +906,11 @@ class merge_plan:
                 # same result slipped through.
                 return False
 
-            self._dprint(
-                "was trying to insert atom '%s' pkg '%s',\nbut '[%s]' exists already",
-                (atom, choices.current_pkg, ", ".join(map(str, conflicts))),
-            )
+            if self._debugging:
+                self._dprint(
+                    "was trying to insert atom '%s' pkg '%s',\nbut '[%s]' exists already",
+                    (atom, choices.current_pkg, ", ".join(map(str, conflicts))),
+                )
 
             try_rematch = False
             if any(True for x in conflicts if isinstance(x, restriction.base)):
@@ -913,7 +931,7 @@ class merge_plan:
                 conflicts = state.replace_op(choices, choices.current_pkg).apply(
                     self.state
                 )
-                if not conflicts:
+                if not conflicts and self._debugging:
                     self._dprint(
                         "replacing vdb entry for '%s' with pkg '%s'",
                         (atom, choices.current_pkg),
@@ -962,10 +980,11 @@ class merge_plan:
             l = self.state.add_blocker(choices, rewrote_blocker, key=x.key)
             if l:
                 # blocker caught something. yay.
-                self._dprint(
-                    "%s blocker %s hit %s for atom %s pkg %s",
-                    (stack[-1].mode, x, l, stack[-1].atom, choices.current_pkg),
-                )
+                if self._debugging:
+                    self._dprint(
+                        "%s blocker %s hit %s for atom %s pkg %s",
+                        (stack[-1].mode, x, l, stack[-1].atom, choices.current_pkg),
+                    )
                 if x.weak_blocker:
                     # note that we use the top frame of the stacks' dbs; this
                     # is to allow us to upgrade as needed.
@@ -1011,7 +1030,8 @@ class merge_plan:
                 else:
                     non_vdb.append(atom)
             if vdb:
-                yield vdb + non_vdb
+                vdb.extend(non_vdb)
+                yield vdb
             else:
                 yield or_block
 
@@ -17,6 +17,17 @@ from .pigeonholes import PigeonHoledSlots
 
 
 class plan_state:
+    __slots__ = (
+        "state",
+        "plan",
+        "pkg_choices",
+        "rev_blockers",
+        "blockers_refcnt",
+        "match_atom",
+        "vdb_filter",
+        "forced_restrictions",
+    )
+
     def __init__(self):
         self.state = PigeonHoledSlots()
         self.plan = []
@@ -41,30 +52,24 @@ class plan_state:
         :param choices: package choices
         :type choices: :obj:`pkgcore.resolver.choice_point.choice_point`
         """
-        l = self.rev_blockers.get(choices, ())
+        l = self.rev_blockers.get(choices, {})
         # walk a copy- it's possible it'll change under foot
-        for blocker, key in l[:]:
-            decref_forward_block_op(choices, blocker, key).apply(self)
+        for (blocker, key), count in list(l.items()):
+            for _ in range(count):
+                decref_forward_block_op(choices, blocker, key).apply(self)
 
     def backtrack(self, state_pos):
         """Backtrack over a plan."""
-        assert state_pos <= len(self.plan)
-        if len(self.plan) == state_pos:
-            return
-
-        # track exactly how many reversions we've done-
-        # since we do a single slicing of plan, if an exception occurs
-        # before finishing we need to prune what has been finished,
-        # and just that.
-        reversion_count = 0
-        try:
-            for reversion_count, change in enumerate(reversed(self.plan[state_pos:])):
-                change.revert(self)
-            reversion_count += 1
-            assert len(self.plan) - reversion_count == state_pos
-        finally:
-            if reversion_count:
-                self.plan = self.plan[:-reversion_count]
+        plan = self.plan
+        assert state_pos <= len(plan)
+
+        # revert from the tail in place, so the cost is proportional to
+        # the number of ops rolled back rather than the size of the plan.
+        # an op is only dropped once reverted- if an exception occurs,
+        # just what was finished is pruned.
+        while len(plan) > state_pos:
+            plan[-1].revert(self)
+            plan.pop()
 
     def iter_ops(self, return_livefs=False):
         iterable = (x for x in self.plan if not x.internal)
@@ -87,6 +92,8 @@ class plan_state:
 
 
 class ops_sequence:
+    __slots__ = ("_ops", "is_livefs")
+
     def __init__(self, sequence, is_livefs=True):
         self._ops = tuple(sequence)
         self.is_livefs = is_livefs
@@ -320,7 +327,9 @@ class incref_forward_block_op(blocker_base_op):
             l = plan.state.add_limiter(self.blocker, self.key)
         else:
             l = []
-        plan.rev_blockers.setdefault(self.choices, []).append((self.blocker, self.key))
+        plan.rev_blockers.setdefault(self.choices, RefCountingSet()).add(
+            (self.blocker, self.key)
+        )
         plan.blockers_refcnt.add(self.blocker)
         return l
 
@@ -342,12 +351,15 @@ class decref_forward_block_op(blocker_base_op):
         plan.blockers_refcnt.remove(self.blocker)
         if self.blocker not in plan.blockers_refcnt:
             plan.state.remove_limiter(self.blocker, self.key)
-        plan.rev_blockers[self.choices].remove((self.blocker, self.key))
-        if not plan.rev_blockers[self.choices]:
+        l = plan.rev_blockers[self.choices]
+        l.remove((self.blocker, self.key))
+        if not l:
             del plan.rev_blockers[self.choices]
 
     def revert(self, plan):
-        plan.rev_blockers.setdefault(self.choices, []).append((self.blocker, self.key))
+        plan.rev_blockers.setdefault(self.choices, RefCountingSet()).add(
+            (self.blocker, self.key)
+        )
         if self.blocker not in plan.blockers_refcnt:
             plan.state.add_limiter(self.blocker, self.key)
         plan.blockers_refcnt.add(self.blocker)
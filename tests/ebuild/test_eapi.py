@@ -4,7 +4,7 @@ from unittest import mock
 import pytest
 from pkgcore.const import EBD_PATH
 from pkgcore.ebuild import eapi
-from pkgcore.ebuild.eapi import EAPI, eapi6, get_eapi
+from pkgcore.ebuild.eapi import EAPI, eapi0, eapi6, get_eapi
 
 
 def test_get_eapi():
@@ -13,40 +13,59 @@ def test_get_eapi():
     assert unknown_eapi in EAPI.unknown_eapis.values()
     # check that unknown EAPI is now registered as an unknown
     assert unknown_eapi == get_eapi("unknown")
+    # cached unknowns aren't returned when unsupported EAPIs aren't suppressed
+    assert get_eapi("unknown", suppress_unsupported=False) is None
 
     # known EAPI
     eapi = get_eapi("6")
     assert eapi6 == eapi
 
+    # invalid EAPI
+    for magic in ("", "-invalid", "6 "):
+        with pytest.raises(ValueError):
+            get_eapi(magic)
+
 
 class TestEAPI:
     def test_register(self, tmp_path):
         # re-register known EAPI
         with pytest.raises(ValueError):
             EAPI.register(magic="0")
+        # invalid EAPI identifier
+        with pytest.raises(ValueError):
+            EAPI.register(magic="-invalid")
 
         mock_ebd_temp = str(shutil.copytree(EBD_PATH, tmp_path / "ebd"))
+        orig_bash_version = eapi.bash_version
         with (
-            mock.patch("pkgcore.ebuild.eapi.bash_version") as bash_version,
             mock.patch.dict(eapi.EAPI.known_eapis),
             mock.patch("pkgcore.ebuild.eapi.const.EBD_PATH", mock_ebd_temp),
         ):
-            # inadequate bash version
-            bash_version.return_value = "3.1"
-            with pytest.raises(SystemExit) as excinfo:
-                new_eapi = EAPI.register(magic="new", optionals={"bash_compat": "3.2"})
-            assert (
-                "EAPI 'new' requires >=bash-3.2, system version: 3.1"
-                == excinfo.value.args[0]
-            )
-
-            # adequate system bash versions
-            bash_version.return_value = "3.2"
-            test_eapi = EAPI.register(magic="test", optionals={"bash_compat": "3.2"})
-            assert test_eapi._magic == "test"
-            bash_version.return_value = "4.2"
-            test_eapi = EAPI.register(magic="test1", optionals={"bash_compat": "4.1"})
-            assert test_eapi._magic == "test1"
+            try:
+                # inadequate bash version
+                eapi.bash_version = lambda: "3.1"
+                with pytest.raises(SystemExit) as excinfo:
+                    new_eapi = EAPI.register(
+                        magic="new", optionals={"bash_compat": "3.2"}
+                    )
+                assert (
+                    "EAPI 'new' requires >=bash-3.2, system version: 3.1"
+                    == excinfo.value.args[0]
+                )
+
+                # adequate system bash versions
+                eapi.bash_version = lambda: "3.2"
+                test_eapi = EAPI.register(
+                    magic="test", optionals={"bash_compat": "3.2"}
+                )
+                assert test_eapi._magic == "test"
+                eapi.bash_version = lambda: "4.2"
+                test_eapi = EAPI.register(
+                    magic="test1", optionals={"bash_compat": "4.1"}
+                )
+                assert test_eapi._magic == "test1"
+            finally:
+                eapi.bash_version = orig_bash_version
 
     def test_is_supported(self, tmp_path, caplog):
         assert eapi6.is_supported
@@ -73,3 +92,18 @@ class TestEAPI:
     def test_ebd_env(self):
         for eapi_str, eapi_obj in EAPI.known_eapis.items():
             assert eapi_obj.ebd_env["EAPI"] == eapi_str
+
+    def test_archive_exts_regex(self):
+        for eapi_obj in (eapi0, eapi6):
+            # longer extensions are tried first
+            pattern = eapi_obj.archive_exts_regex_pattern
+            assert pattern.index(r"\.tar\.gz") < pattern.index(r"|\.gz")
+
+            regex = eapi_obj.archive_exts_regex
+            assert regex.search("foo-1.tar.gz").group(1) == ".tar.gz"
+            assert regex.search("foo-1.gz").group(1) == ".gz"
+            assert regex.search("foo-1.tar").group(1) == ".tar"
+            assert regex.search("foo-1.txt") is None
+        # case insensitive matching
+        assert eapi0.archive_exts_regex.search("foo-1.TAR.GZ") is None
+        assert eapi6.archive_exts_regex.search("foo-1.TAR.GZ").group(1) == ".TAR.GZ"
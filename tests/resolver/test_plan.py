@@ -1,5 +1,7 @@
 import pytest
+from pkgcore.ebuild.atom import atom
 from pkgcore.resolver import plan
+from pkgcore.restrictions import packages
 from pkgcore.test.misc import FakePkg
 
 
@@ -28,3 +30,38 @@ def test_pkg_sorting(sorter, vers, expected, iter_sort_target):
     if iter_sort_target:
         pkgs = [x[0] for x in pkgs]
     assert [int(x.fullver) for x in pkgs] == expected
+
+
+class TestResolverStack:
+    class fake_dbs:
+        def itermatch(self, restrict):
+            return iter(())
+
+    def add_frame(self, stack, atom):
+        return stack.add_frame("depend", atom, None, self.fake_dbs(), 0, False)
+
+    def test_index(self):
+        stack = plan.resolver_stack()
+        frames = [self.add_frame(stack, atom(f"dev-util/foo{x}")) for x in range(3)]
+        for idx, frame in enumerate(frames):
+            assert stack.index(frame) == idx
+        assert stack.index(frames[0], start=1) == -1
+        assert stack.index(frames[2], stop=2) == -1
+        stack.pop_frame(True)
+        assert stack.index(frames[2]) == -1
+
+    def test_may_cycle(self):
+        stack = plan.resolver_stack()
+        foo = self.add_frame(stack, atom("dev-util/foo"))
+        bar = self.add_frame(stack, atom("dev-util/bar"))
+        assert not stack.may_cycle(foo)
+        assert not stack.may_cycle(bar)
+        foo2 = self.add_frame(stack, atom(">=dev-util/foo-1"))
+        assert stack.may_cycle(foo2)
+        stack.pop_frame(True)
+        assert not stack.may_cycle(foo)
+        # unkeyed restrictions can match anything
+        self.add_frame(stack, packages.AlwaysTrue)
+        assert stack.may_cycle(bar)
+        stack.pop_frame(True)
+        assert not stack.may_cycle(bar)
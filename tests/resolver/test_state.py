@@ -0,0 +1,66 @@
+import pytest
+from pkgcore.ebuild.atom import atom
+from pkgcore.resolver import state
+
+
+class fake_op:
+    internal = False
+
+    def __init__(self, reverted, fail=False):
+        self.reverted = reverted
+        self.fail = fail
+
+    def apply(self, plan):
+        plan.plan.append(self)
+
+    def revert(self, plan):
+        if self.fail:
+            raise ValueError(self)
+        self.reverted.append(self)
+
+
+class TestPlanState:
+    def test_backtrack(self):
+        s = state.plan_state()
+        reverted = []
+        ops = [fake_op(reverted) for _ in range(4)]
+        for op in ops:
+            op.apply(s)
+        s.backtrack(4)
+        assert not reverted
+        s.backtrack(1)
+        assert reverted == ops[:0:-1]
+        assert s[:] == ops[:1]
+        assert s.current_state == 1
+
+    def test_backtrack_failure(self):
+        s = state.plan_state()
+        reverted = []
+        ops = [fake_op(reverted), fake_op(reverted, fail=True), fake_op(reverted)]
+        for op in ops:
+            op.apply(s)
+        with pytest.raises(ValueError):
+            s.backtrack(0)
+        # only the successfully reverted op is pruned
+        assert reverted == ops[2:]
+        assert s[:] == ops[:2]
+
+    def test_pkg_blockers(self):
+        s = state.plan_state()
+        choices = object()
+        blocker = atom("!dev-util/foo")
+        assert not s.add_blocker(choices, blocker)
+        assert not s.add_blocker(choices, blocker)
+        assert s.rev_blockers[choices] == {(blocker, blocker.key): 2}
+        assert blocker in s.state.limiters[blocker.key].values()
+        s._remove_pkg_blockers(choices)
+        assert choices not in s.rev_blockers
+        assert not s.blockers_refcnt
+        assert not s.state.limiters
+        # reverting the removal restores the refcounts
+        s.backtrack(2)
+        assert s.rev_blockers[choices] == {(blocker, blocker.key): 2}
+        assert s.blockers_refcnt[blocker] == 2
+        s.backtrack(0)
+        assert not s.rev_blockers
+        assert not s.state.limiters